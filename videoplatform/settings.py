@@ -35,6 +35,14 @@ ALLOWED_HOSTS = []
 CELERY_BROKER_URL = 'redis://localhost:6379/0'
 CELERY_RESULT_BACKEND = 'redis://localhost:6379/0'
 
+# Transcription used by videos.tasks.process_video_task:
+# 'single' runs TRANSCRIPTION_MODEL over the whole file; 'cascade' scans with
+# TRANSCRIPTION_MODEL and re-transcribes candidate name hits with
+# TRANSCRIPTION_REFINE_MODEL (compare with `manage.py benchmark_transcription`)
+TRANSCRIPTION_MODE = 'single'
+TRANSCRIPTION_MODEL = 'tiny'
+TRANSCRIPTION_REFINE_MODEL = 'small'
+
 
 
 # Application definition
@@ -1,37 +1,133 @@
-# videos/admin.py
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.core.paginator import Paginator
+from django.db.models import Count, Min
+from django.urls import reverse
 from .models import Video, Player, VideoPlayer
-import datetime
 
-# Helper to format timestamps nicely
-def format_timestamp(seconds):
-    return str(datetime.timedelta(seconds=int(seconds)))
+# Player summary rows shown per page on the Video change page
+MENTION_SUMMARY_PER_PAGE = 25
 
-# Inline for VideoPlayer objects inside Video admin
-class VideoPlayerInline(admin.TabularInline):
-    model = VideoPlayer
-    extra = 0  # no empty extra rows
-    readonly_fields = ('player', 'formatted_timestamp')
-    can_delete = False  # optional: prevent deletion from inline
+# Videos whose mention payloads include any of these players
+def mentioned_video_ids(player_ids):
+    return set(
+        VideoPlayer.objects.filter(player_id__in=player_ids)
+        .values_list('video_id', flat=True)
+    )
 
-    # Display formatted timestamp
-    def formatted_timestamp(self, obj):
-        return format_timestamp(obj.timestamp)
-    formatted_timestamp.short_description = "Timestamp"
+# Count mentions in the changelist query instead of one query per row.
+# Only the changelist annotates; the change view has its own summary and
+# must not pay for the join.
+class MentionCountChangeList(ChangeList):
+    def get_queryset(self, request, exclude_parameters=None):
+        if 'mention_count' not in self.root_queryset.query.annotations:
+            self.root_queryset = self.root_queryset.annotate(mention_count=Count('videoplayer'))
+        return super().get_queryset(request, exclude_parameters)
 
 # Video admin: show one row per video
 @admin.register(Video)
 class VideoAdmin(admin.ModelAdmin):
-    list_display = ('title', 'uploaded_at')
-    inlines = [VideoPlayerInline]
+    list_display = ('title', 'status', 'uploaded_at', 'mention_count')
+    list_filter = ('status', 'uploaded_at')  # both columns are indexed
+    date_hierarchy = 'uploaded_at'
+    search_fields = ('title',)
+
+    # Edits change the API payload, so invalidate its ETags
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change:
+            Video.bump_processing_version(obj.pk)
+
+    def get_changelist(self, request, **kwargs):
+        return MentionCountChangeList
+
+    @admin.display(description="Mentions", ordering='mention_count')
+    def mention_count(self, obj):
+        return obj.mention_count
+
+    # Replace the unbounded VideoPlayer inline with an aggregated,
+    # paginated per-player summary (see admin/videos/video/change_form.html)
+    def change_view(self, request, object_id, form_url='', extra_context=None):
+        extra_context = extra_context or {}
+        video = self.get_object(request, object_id)
+        if video is not None:
+            extra_context.update(self.mention_summary_context(request, video))
+        return super().change_view(request, object_id, form_url, extra_context)
+
+    def mention_summary_context(self, request, video):
+        summary = (
+            VideoPlayer.objects.filter(video=video)
+            .values('player_id', 'player__name')
+            .annotate(mentions=Count('id'), first_mention=Min('timestamp'))
+            .order_by('-mentions', 'player__name')
+        )
+        paginator = Paginator(summary, MENTION_SUMMARY_PER_PAGE)
+        page = paginator.get_page(request.GET.get('mentions_page'))
+        changelist_url = reverse('admin:videos_videoplayer_changelist')
+        for row in page:
+            row['mentions_url'] = (
+                f"{changelist_url}?video__id__exact={video.pk}"
+                f"&player__id__exact={row['player_id']}"
+            )
+        # Page links keep the rest of the query string (e.g. _changelist_filters)
+        page_urls = {}
+        if page.has_previous():
+            page_urls['mention_summary_previous_url'] = self.mentions_page_url(request, page.previous_page_number())
+        if page.has_next():
+            page_urls['mention_summary_next_url'] = self.mentions_page_url(request, page.next_page_number())
+        return {'mention_summary': page, **page_urls}
+
+    def mentions_page_url(self, request, number):
+        query = request.GET.copy()
+        query['mentions_page'] = number
+        return f"?{query.urlencode()}"
 
 # Player admin: just show player name
 @admin.register(Player)
 class PlayerAdmin(admin.ModelAdmin):
     list_display = ('name',)
+    search_fields = ('name',)
+
+    # Player names are embedded in mention payloads, so renames and deletes
+    # bump every video the player is mentioned in
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change and 'name' in form.changed_data:
+            Video.bump_processing_version(*mentioned_video_ids([obj.pk]))
+
+    def delete_model(self, request, obj):
+        video_ids = mentioned_video_ids([obj.pk])
+        super().delete_model(request, obj)
+        Video.bump_processing_version(*video_ids)
+
+    def delete_queryset(self, request, queryset):
+        video_ids = mentioned_video_ids(list(queryset.values_list('pk', flat=True)))
+        super().delete_queryset(request, queryset)
+        Video.bump_processing_version(*video_ids)
+
+# Individual mentions, reached from the Video summary table
+@admin.register(VideoPlayer)
+class VideoPlayerAdmin(admin.ModelAdmin):
+    list_display = ('video', 'player', 'timestamp')
+    list_select_related = ('video', 'player')
+    raw_id_fields = ('video', 'player')
+    list_filter = ('video__status',)
+    show_full_result_count = False  # skip the extra COUNT(*) on huge tables
+    ordering = ('video', 'timestamp')
+
+    # Keep API ETags in sync with manual corrections
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        video_ids = [obj.video_id]
+        if change and 'video' in form.changed_data:
+            video_ids.append(form.initial['video'])
+        Video.bump_processing_version(*video_ids)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        Video.bump_processing_version(obj.video_id)
 
-# Optionally, do NOT register VideoPlayer separately
-# @admin.register(VideoPlayer)
-# class VideoPlayerAdmin(admin.ModelAdmin):
-#     list_display = ('video', 'player', 'timestamp')
-#     list_filter = ('video', 'player')
+    def delete_queryset(self, request, queryset):
+        video_ids = list(queryset.values_list('video_id', flat=True).distinct())
+        super().delete_queryset(request, queryset)
+        Video.bump_processing_version(*video_ids)
@@ -0,0 +1,151 @@
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from rest_framework import viewsets
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination
+from .models import Video, Player, VideoPlayer
+from .serializers import PlayerSerializer, VideoSerializer, MentionSerializer
+import datetime
+import hashlib
+
+# Helper function to format seconds into hh:mm:ss (same format as stored timestamps)
+def format_time(seconds):
+    return str(datetime.timedelta(seconds=int(seconds)))
+
+# Upper bounds for query parameters: ids must fit a signed 64-bit column and
+# time offsets must stay below ten hours, where "h:mm:ss" strings stop
+# sorting like numbers
+MAX_ID = 2 ** 63 - 1
+MAX_SECONDS = 10 * 60 * 60 - 1
+
+# Optional integer query parameter in [0, maximum]; rejects anything else with a 400
+def int_param(request, name, maximum=MAX_ID):
+    value = request.query_params.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValidationError({name: "A valid integer is required."})
+    if number < 0:
+        raise ValidationError({name: "Ensure this value is greater than or equal to 0."})
+    if number > maximum:
+        raise ValidationError({name: f"Ensure this value is less than or equal to {maximum}."})
+    return number
+
+# Fingerprint of the ready videos a response can depend on: one aggregate
+# query, which is all a conditional GET that ends in 304 costs. Count and max
+# id catch deletions and additions; version_updated_at only moves forward, so
+# any bump changes the fingerprint even when a deletion offsets it
+def version_state(video_id=None):
+    videos = Video.objects.filter(status='ready')
+    if video_id is not None:
+        videos = videos.filter(pk=video_id)
+    return videos.aggregate(
+        count=Count('id'), last=Max('id'), updated=Max('version_updated_at')
+    )
+
+
+class IdCursorPagination(CursorPagination):
+    ordering = 'id'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+
+class ConditionalGetMixin:
+    """Serve 304 responses when the client's ETag matches the version state."""
+    pagination_class = IdCursorPagination
+    lookup_value_regex = r'\d{1,18}'  # larger ids overflow the database column
+
+    def get_version_state(self):
+        return version_state()
+
+    # The representation (JSON vs browsable HTML) is part of the ETag
+    def get_etag(self, request):
+        raw = (f"{request.get_full_path()}|{request.accepted_renderer.format}|"
+               f"{self.get_version_state()}")
+        return quote_etag(hashlib.md5(raw.encode()).hexdigest())
+
+    # get_conditional_response uses weak comparison for If-None-Match
+    def conditional_response(self, request, build_response):
+        etag = self.get_etag(request)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = build_response()
+        response['ETag'] = etag
+        patch_cache_control(response, no_cache=True)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request, lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs)
+        )
+
+
+class PlayerViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    serializer_class = PlayerSerializer
+
+    def get_queryset(self):
+        return Player.objects.values('id', 'name')
+
+    # The payload only depends on the player table: count and max id catch
+    # additions and deletions, updated_at catches renames
+    def get_version_state(self):
+        return Player.objects.aggregate(
+            count=Count('id'), last=Max('id'), updated=Max('updated_at')
+        )
+
+
+class VideoViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    """Ready videos; ?player=<id> keeps only videos mentioning that player."""
+    serializer_class = VideoSerializer
+
+    def get_queryset(self):
+        videos = Video.objects.filter(status='ready')
+        player_id = int_param(self.request, 'player')
+        if player_id is not None:
+            videos = videos.filter(videoplayer__player_id=player_id).distinct()
+        return videos.values('id', 'title', 'file', 'uploaded_at', 'processing_version')
+
+    def get_version_state(self):
+        if 'pk' in self.kwargs:
+            return version_state(self.kwargs['pk'])
+        return version_state()
+
+
+class MentionViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Player mentions in ready videos.
+
+    Filters: ?player=<id>, ?video=<id>, ?start=<seconds>, ?end=<seconds>.
+    The time range compares the stored "h:mm:ss" strings, which sort
+    correctly for videos shorter than ten hours.
+    """
+    serializer_class = MentionSerializer
+
+    def get_queryset(self):
+        mentions = VideoPlayer.objects.filter(video__status='ready')
+        player_id = int_param(self.request, 'player')
+        if player_id is not None:
+            mentions = mentions.filter(player_id=player_id)
+        video_id = int_param(self.request, 'video')
+        if video_id is not None:
+            mentions = mentions.filter(video_id=video_id)
+        start = int_param(self.request, 'start', MAX_SECONDS)
+        if start is not None:
+            mentions = mentions.filter(timestamp__gte=format_time(start))
+        end = int_param(self.request, 'end', MAX_SECONDS)
+        if end is not None:
+            mentions = mentions.filter(timestamp__lte=format_time(end))
+        return mentions.values('id', 'video_id', 'player_id', 'player__name', 'timestamp')
+
+    # Scope the ETag to one video when the client asks for one
+    def get_version_state(self):
+        return version_state(int_param(self.request, 'video'))
@@ -0,0 +1,129 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from videos.transcription import extract_audio, load_model, transcribe_single, transcribe_cascade
+import csv
+import os
+import shutil
+import tempfile
+import time
+
+# Two hits of the same player count as the same mention within this many seconds
+MATCH_TOLERANCE = 2.0
+
+
+def score(hits, reference):
+    """Precision and recall of hits against reference, pairing each mention once."""
+    unmatched = list(reference)
+    true_positives = 0
+    for seconds, name in sorted(hits):
+        for i, (ref_seconds, ref_name) in enumerate(unmatched):
+            if ref_name == name and abs(ref_seconds - seconds) <= MATCH_TOLERANCE:
+                true_positives += 1
+                del unmatched[i]
+                break
+    precision = true_positives / len(hits) if hits else 1.0
+    recall = true_positives / len(reference) if reference else 1.0
+    return precision, recall
+
+
+def load_ground_truth(path):
+    """Read labelled mentions from a CSV of seconds,name rows (header optional)."""
+    mentions = []
+    with open(path, newline="") as f:
+        for line_number, row in enumerate(csv.reader(f), start=1):
+            if not row or row[0].startswith("#"):
+                continue
+            try:
+                seconds, name = float(row[0]), row[1].strip().lower()
+            except (ValueError, IndexError):
+                if line_number == 1:
+                    continue  # header
+                raise CommandError(f"{path}:{line_number}: expected seconds,name")
+            mentions.append((seconds, name))
+    return mentions
+
+
+def timed(run):
+    cpu, wall = time.process_time(), time.perf_counter()
+    hits = run()
+    return hits, time.process_time() - cpu, time.perf_counter() - wall
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare single-pass and cascade transcription on one video: CPU time, "
+        "wall time, and precision/recall of player mentions. With --ground-truth "
+        "the scores measure accuracy against labelled mentions; without it they "
+        "only measure agreement with a single pass of the reference model, which "
+        "therefore always scores 1.00/1.00. Models are loaded before timing; "
+        "load time (wall seconds, including any download) has its own column."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("video", help="Path to a video or audio file")
+        parser.add_argument("--players", required=True, help="Comma-separated player names")
+        parser.add_argument("--scan-model", default=settings.TRANSCRIPTION_MODEL)
+        parser.add_argument("--refine-model", default=settings.TRANSCRIPTION_REFINE_MODEL)
+        parser.add_argument("--reference-model", default=None,
+                            help="Model whose output is scored against when no "
+                                 "--ground-truth is given (defaults to the refine model)")
+        parser.add_argument("--ground-truth", default=None,
+                            help="CSV of labelled mentions (seconds,name) to score against")
+
+    def handle(self, *args, **options):
+        player_names = [p.strip().lower() for p in options["players"].split(",") if p.strip()]
+        scan_model = options["scan_model"]
+        refine_model = options["refine_model"]
+        reference_model = options["reference_model"] or refine_model
+        ground_truth = None
+        if options["ground_truth"]:
+            ground_truth = load_ground_truth(options["ground_truth"])
+
+        tmpdir = tempfile.mkdtemp()
+        try:
+            audio_path = os.path.join(tmpdir, "audio.wav")
+            extract_audio(options["video"], audio_path)
+
+            # Load (and download) every model before timing, so the runs
+            # compare transcription cost only; load time is reported apart
+            load_seconds = {}
+            for name in dict.fromkeys([reference_model, scan_model, refine_model]):
+                _, _, load_seconds[name] = timed(lambda: load_model(name))
+
+            runs = [
+                (f"single {reference_model}" + ("" if ground_truth is not None else " (reference)"),
+                 [reference_model],
+                 lambda: transcribe_single(audio_path, player_names, reference_model)),
+                (f"single {scan_model}",
+                 [scan_model],
+                 lambda: transcribe_single(audio_path, player_names, scan_model)),
+                (f"cascade {scan_model} -> {refine_model}",
+                 [scan_model, refine_model],
+                 lambda: transcribe_cascade(audio_path, player_names, scan_model, refine_model)),
+            ]
+            results = [
+                (label, sum(load_seconds[name] for name in models), *timed(run))
+                for label, models, run in runs
+            ]
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+        if ground_truth is not None:
+            reference = ground_truth
+            self.stdout.write(f"Scoring against {len(reference)} labelled mentions")
+        else:
+            reference = results[0][2]
+            self.stdout.write(
+                f"Scoring agreement with {reference_model} (not accuracy; "
+                "pass --ground-truth for that)"
+            )
+        self.stdout.write(
+            f"{'mode':<34}{'load s':>9}{'cpu s':>9}{'wall s':>9}{'hits':>7}"
+            f"{'precision':>11}{'recall':>8}"
+        )
+        for label, load, hits, cpu, wall in results:
+            precision, recall = score(hits, reference)
+            self.stdout.write(
+                f"{label:<34}{load:>9.1f}{cpu:>9.1f}{wall:>9.1f}{len(hits):>7}"
+                f"{precision:>11.2f}{recall:>8.2f}"
+            )
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2026-10-19 10:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('videos', '0004_remove_video_thumbnail_video_status'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='video',
+            name='status',
+            field=models.CharField(choices=[('processing', 'Processing'), ('ready', 'Ready')], db_index=True, default='processing', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='video',
+            name='uploaded_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AddIndex(
+            model_name='videoplayer',
+            index=models.Index(fields=['video', 'player'], name='videos_vide_video_i_473f63_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 10:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('videos', '0005_alter_video_status_alter_video_uploaded_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='video',
+            name='processing_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
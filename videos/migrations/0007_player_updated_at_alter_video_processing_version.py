@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-19 10:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('videos', '0006_video_processing_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='player',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AlterField(
+            model_name='video',
+            name='processing_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
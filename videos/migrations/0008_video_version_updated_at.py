@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-19 10:36
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('videos', '0007_player_updated_at_alter_video_processing_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='video',
+            name='version_updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
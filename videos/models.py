@@ -1,7 +1,10 @@
 from django.db import models
+from django.utils import timezone
 
 class Player(models.Model):
     name = models.CharField(max_length=100)
+    # Part of the API ETag for the player list, so renames invalidate it
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
@@ -9,17 +12,33 @@ class Player(models.Model):
 class Video(models.Model):
     title = models.CharField(max_length=200)
     file = models.FileField(upload_to='videos/')
-    uploaded_at = models.DateTimeField(auto_now_add=True)
+    uploaded_at = models.DateTimeField(auto_now_add=True, db_index=True)
     status = models.CharField(
         max_length=20,
         choices=[('processing', 'Processing'), ('ready', 'Ready')],
-        default='processing'
+        default='processing',
+        db_index=True
     )
+    # Bumped whenever the video or its mentions change; API ETags derive from
+    # version_updated_at, which only moves forward
+    processing_version = models.PositiveIntegerField(default=0, editable=False)
+    version_updated_at = models.DateTimeField(default=timezone.now, editable=False)
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def bump_processing_version(cls, *video_ids):
+        cls.objects.filter(pk__in=video_ids).update(
+            processing_version=models.F('processing_version') + 1,
+            version_updated_at=timezone.now(),
+        )
+
 class VideoPlayer(models.Model):
     video = models.ForeignKey(Video, on_delete=models.CASCADE)
     player = models.ForeignKey(Player, on_delete=models.CASCADE)
     timestamp = models.CharField(max_length=20)  # e.g., "00:01:12"
+
+    class Meta:
+        # Covers the per-player mention summary (GROUP BY player for one video)
+        indexes = [models.Index(fields=['video', 'player'])]
@@ -0,0 +1,28 @@
+from django.urls import reverse
+from rest_framework import serializers
+
+# These serializers read the dicts produced by QuerySet.values() in api.py,
+# so no model instances are built for list responses.
+
+class PlayerSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+
+
+class VideoSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    title = serializers.CharField()
+    uploaded_at = serializers.DateTimeField()
+    processing_version = serializers.IntegerField()
+    stream_url = serializers.SerializerMethodField()
+
+    def get_stream_url(self, row):
+        return reverse('stream_video', args=[row['file']])
+
+
+class MentionSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    video = serializers.IntegerField(source='video_id')
+    player = serializers.IntegerField(source='player_id')
+    player_name = serializers.CharField(source='player__name')
+    timestamp = serializers.CharField()
@@ -1,17 +1,16 @@
 from celery import shared_task
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 from .models import Video, Player, VideoPlayer
-from faster_whisper import WhisperModel
+from .transcription import extract_audio, format_time, transcribe_single, transcribe_cascade
 import subprocess
 import os
-import datetime
 import tempfile
 import shutil
-import re
 
-# Helper functions
-def format_time(seconds):
-    return str(datetime.timedelta(seconds=int(seconds)))
+TRANSCRIPTION_MODES = ('single', 'cascade')
 
+# Helper functions
 def get_video_duration(video_path):
     result = subprocess.run(
         ["ffprobe", "-v", "error", "-show_entries", "format=duration",
@@ -23,12 +22,18 @@ def get_video_duration(video_path):
 
 @shared_task(bind=True)
 def process_video_task(self, video_id, players_text):
+    mode = settings.TRANSCRIPTION_MODE
+    if mode not in TRANSCRIPTION_MODES:
+        raise ImproperlyConfigured(
+            f"TRANSCRIPTION_MODE must be one of {TRANSCRIPTION_MODES}, not {mode!r}"
+        )
+
     print("Form is valid. Saving video...", flush=True)
     video = Video.objects.get(id=video_id)
     print(f"Video saved: {video.file.path}", flush=True)
 
     # Parse players
-    player_names = [p.strip() for p in players_text.split(',')]
+    player_names = [p.strip() for p in players_text.split(',') if p.strip()]
     player_name_map = {
         name.lower(): Player.objects.get_or_create(name=name)[0]
         for name in player_names
@@ -40,42 +45,30 @@ def process_video_task(self, video_id, players_text):
     try:
         audio_path = os.path.join(tmpdir, "audio.wav")
         video_path = video.file.path
-        subprocess.run(
-            ["ffmpeg", "-i", video_path, "-vn", "-acodec", "pcm_s16le",
-             "-ar", "16000", "-ac", "1", audio_path, "-y"],
-            check=True
-        )
+        extract_audio(video_path, audio_path)
         print(f"✅ Audio extracted: {audio_path}", flush=True)
 
         total_seconds = get_video_duration(video_path)
-        total_formatted = format_time(total_seconds)
+        print(f"Video duration: {format_time(total_seconds)}", flush=True)
 
-        # Load Whisper
-        print("Starting transcription using Whisper (CPU)...", flush=True)
-        model = WhisperModel("tiny", device="cpu", compute_type="int8")
-        segments, _ = model.transcribe(audio_path, beam_size=1, language="it", word_timestamps=True)
+        # Transcribe with Whisper (CPU) and match player names
+        print(f"Starting {mode} transcription using Whisper (CPU)...", flush=True)
+        if mode == 'cascade':
+            hits = transcribe_cascade(
+                audio_path, list(player_name_map),
+                scan_model=settings.TRANSCRIPTION_MODEL,
+                refine_model=settings.TRANSCRIPTION_REFINE_MODEL,
+            )
+        else:
+            hits = transcribe_single(audio_path, list(player_name_map), settings.TRANSCRIPTION_MODEL)
         print("Transcription completed!", flush=True)
 
-        # Compile regex for all player names
-        pattern = re.compile(r"\b(" + "|".join(map(re.escape, player_name_map.keys())) + r")\b", re.IGNORECASE)
-
-        # Match players efficiently
         matches = []
-        last_print_second = -1
-        for segment in segments:
-            for word in segment.words:
-                current_second = int(word.start)
-                if current_second != last_print_second:
-                    print(f"Processing word at {format_time(word.start)} / {total_formatted}", flush=True)
-                    last_print_second = current_second
-
-                match = pattern.search(word.word)
-                if match:
-                    pname_lower = match.group(0).lower()
-                    player_obj = player_name_map[pname_lower]
-                    ts = format_time(word.start)
-                    matches.append(VideoPlayer(video=video, player=player_obj, timestamp=ts))
-                    print(f"⏱ {ts} → Player matched: {player_obj.name}", flush=True)
+        for seconds, pname_lower in hits:
+            player_obj = player_name_map[pname_lower]
+            ts = format_time(seconds)
+            matches.append(VideoPlayer(video=video, player=player_obj, timestamp=ts))
+            print(f"⏱ {ts} → Player matched: {player_obj.name}", flush=True)
 
         # Bulk save all matches
         if matches:
@@ -84,11 +77,12 @@ def process_video_task(self, video_id, players_text):
         else:
             print("No player mentions found.", flush=True)
 
-        # Mark as ready
+        # Mark as ready (new version invalidates API ETags for this video)
         video.status = 'ready'
-        video.save()
+        video.save(update_fields=['status'])
+        Video.bump_processing_version(video.pk)
 
     finally:
         shutil.rmtree(tmpdir, ignore_errors=True)
         print(f"Temporary audio folder deleted: {tmpdir}", flush=True)
-        print("Processing completed.", flush=True)  
\ No newline at end of file
+        print("Processing completed.", flush=True)  
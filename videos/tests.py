@@ -1,3 +1,375 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from .management.commands.benchmark_transcription import load_ground_truth, score
+from .models import Video, Player, VideoPlayer
+from .tasks import process_video_task
+from .transcription import candidate_windows, is_candidate, name_pattern, name_similarity
+from io import StringIO
+from unittest import mock
+import os
+import tempfile
 
-# Create your tests here.
+
+class VideoAdminTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(self.user)
+        self.video = Video.objects.create(title='Match', file='videos/match.mp4', status='ready')
+        players = [Player.objects.create(name=f'Player {i}') for i in range(30)]
+        VideoPlayer.objects.bulk_create([
+            VideoPlayer(video=self.video, player=players[i % 30], timestamp=f'0:{i % 60:02d}:00')
+            for i in range(90)
+        ])
+        self.change_url = reverse('admin:videos_video_change', args=[self.video.pk])
+
+    def test_changelist_shows_mention_count(self):
+        response = self.client.get(reverse('admin:videos_video_changelist'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '<td class="field-mention_count">90</td>', html=True)
+
+    def test_changelist_orders_by_mention_count(self):
+        quiet = Video.objects.create(title='Quiet', file='videos/quiet.mp4', status='ready')
+        response = self.client.get(reverse('admin:videos_video_changelist') + '?o=4')
+        self.assertEqual(list(response.context['cl'].result_list), [quiet, self.video])
+
+    def test_change_view_does_not_count_mentions_per_lookup(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.change_url)
+        self.assertEqual(response.status_code, 200)
+        video_lookups = [
+            q['sql'] for q in queries.captured_queries
+            if 'FROM "videos_video"' in q['sql'] and 'COUNT(' in q['sql']
+        ]
+        self.assertEqual(video_lookups, [])
+
+    def test_mention_summary_is_paginated(self):
+        response = self.client.get(self.change_url)
+        page = response.context['mention_summary']
+        self.assertEqual(len(page), 25)
+        self.assertEqual(page.paginator.count, 30)
+        self.assertEqual(page[0]['mentions'], 3)
+
+    def test_mention_summary_links_keep_query_string(self):
+        filters = '_changelist_filters=status__exact%3Dready'
+        response = self.client.get(f'{self.change_url}?{filters}&mentions_page=2')
+        self.assertEqual(len(response.context['mention_summary']), 5)
+        previous_url = response.context['mention_summary_previous_url']
+        self.assertIn(filters, previous_url)
+        self.assertIn('mentions_page=1', previous_url)
+        self.assertNotIn('mention_summary_next_url', response.context)
+
+
+class MentionApiTests(TestCase):
+    def setUp(self):
+        self.video = Video.objects.create(title='Match', file='videos/match.mp4', status='ready')
+        self.other_video = Video.objects.create(title='Replay', file='videos/replay.mp4', status='ready')
+        self.pending_video = Video.objects.create(title='Upload', file='videos/upload.mp4')
+        self.lautaro = Player.objects.create(name='Lautaro')
+        self.barella = Player.objects.create(name='Barella')
+        VideoPlayer.objects.bulk_create([
+            VideoPlayer(video=self.video, player=self.lautaro, timestamp='0:00:30'),
+            VideoPlayer(video=self.video, player=self.barella, timestamp='0:02:00'),
+            VideoPlayer(video=self.video, player=self.lautaro, timestamp='0:05:00'),
+            VideoPlayer(video=self.other_video, player=self.lautaro, timestamp='0:01:00'),
+            VideoPlayer(video=self.pending_video, player=self.lautaro, timestamp='0:01:00'),
+        ])
+
+    def mention_timestamps(self, query):
+        response = self.client.get(f'/api/mentions/?{query}')
+        self.assertEqual(response.status_code, 200)
+        return [row['timestamp'] for row in response.json()['results']]
+
+    def test_mentions_skip_videos_still_processing(self):
+        self.assertEqual(len(self.mention_timestamps('')), 4)
+
+    def test_mentions_filter_by_player_and_video(self):
+        self.assertEqual(
+            self.mention_timestamps(f'player={self.lautaro.pk}&video={self.video.pk}'),
+            ['0:00:30', '0:05:00'],
+        )
+        self.assertEqual(self.mention_timestamps(f'player={self.barella.pk}'), ['0:02:00'])
+
+    def test_mentions_filter_by_time_range(self):
+        self.assertEqual(
+            self.mention_timestamps(f'video={self.video.pk}&start=60&end=300'),
+            ['0:02:00', '0:05:00'],
+        )
+
+    def test_invalid_integer_parameters_are_rejected(self):
+        for query in ('start=abc', 'end=-5', 'video=1.5', 'player=-1',
+                      'video=99999999999999999999999', f'player={2 ** 63}',
+                      'start=1000000000000000', 'end=36000'):
+            response = self.client.get(f'/api/mentions/?{query}')
+            self.assertEqual(response.status_code, 400, query)
+
+    def test_oversized_detail_id_is_not_found(self):
+        response = self.client.get('/api/videos/99999999999999999999999/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_videos_filter_by_player(self):
+        response = self.client.get(f'/api/videos/?player={self.barella.pk}')
+        self.assertEqual([row['id'] for row in response.json()['results']], [self.video.pk])
+
+    def test_cursor_pagination(self):
+        response = self.client.get('/api/mentions/?page_size=3')
+        data = response.json()
+        self.assertEqual(len(data['results']), 3)
+        response = self.client.get(data['next'])
+        self.assertEqual(len(response.json()['results']), 1)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.video = Video.objects.create(title='Match', file='videos/match.mp4', status='ready')
+        self.other_video = Video.objects.create(title='Replay', file='videos/replay.mp4', status='ready')
+        self.player = Player.objects.create(name='Lautaro')
+        self.mention = VideoPlayer.objects.create(video=self.video, player=self.player, timestamp='0:00:30')
+
+    def etag(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        return response['ETag']
+
+    def assertNotModified(self, url, etag):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(len(queries.captured_queries), 1)
+
+    def assertModified(self, url, etag):
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def admin_post(self, url, data):
+        self.client.force_login(self.user)
+        response = self.client.post(url, data)
+        self.client.logout()
+        self.assertEqual(response.status_code, 302)
+
+    def test_unchanged_data_returns_not_modified(self):
+        for url in ('/api/players/', '/api/videos/', f'/api/videos/{self.video.pk}/',
+                    f'/api/mentions/?video={self.video.pk}', f'/api/mentions/{self.mention.pk}/'):
+            self.assertNotModified(url, self.etag(url))
+
+    def test_weak_etag_matches(self):
+        url = '/api/videos/'
+        etag = self.etag(url)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=f'W/{etag}')
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_etag_depends_on_representation(self):
+        url = '/api/videos/'
+        html_etag = self.client.get(url, HTTP_ACCEPT='text/html')['ETag']
+        json_response = self.client.get(url, HTTP_ACCEPT='application/json', HTTP_IF_NONE_MATCH=html_etag)
+        self.assertEqual(json_response.status_code, 200)
+        self.assertNotEqual(json_response['ETag'], html_etag)
+
+    def test_deleting_a_video_while_another_becomes_ready_invalidates_etag(self):
+        # Keep count, max id and the sum of versions unchanged across the edit
+        pending = Video.objects.create(title='Upload', file='videos/upload.mp4')
+        newest = Video.objects.create(title='Final', file='videos/final.mp4', status='ready')
+        Video.bump_processing_version(self.video.pk, self.other_video.pk, newest.pk)
+        etag = self.etag('/api/videos/')
+        Video.objects.filter(pk=self.video.pk).delete()
+        Video.objects.filter(pk=pending.pk).update(status='ready')
+        Video.bump_processing_version(pending.pk)
+        self.assertModified('/api/videos/', etag)
+
+    def test_etag_depends_on_query_string(self):
+        self.assertNotEqual(
+            self.etag(f'/api/mentions/?video={self.video.pk}'),
+            self.etag(f'/api/mentions/?video={self.other_video.pk}'),
+        )
+
+    def test_mentions_etag_is_scoped_to_requested_video(self):
+        url = f'/api/mentions/?video={self.video.pk}'
+        etag = self.etag(url)
+        Video.bump_processing_version(self.other_video.pk)
+        self.assertNotModified(url, etag)
+        Video.bump_processing_version(self.video.pk)
+        self.assertModified(url, etag)
+
+    def test_processing_task_invalidates_etag(self):
+        pending = Video.objects.create(title='Upload', file='videos/upload.mp4')
+        etag = self.etag('/api/videos/')
+        with mock.patch('videos.tasks.extract_audio'), \
+                mock.patch('videos.tasks.get_video_duration', return_value=60.0), \
+                mock.patch('videos.tasks.transcribe_single', return_value=[(12.0, 'lautaro')]):
+            # An admin edit made while the task runs must survive
+            Video.objects.filter(pk=pending.pk).update(title='Edited')
+            process_video_task(pending.pk, 'Lautaro')
+        pending.refresh_from_db()
+        self.assertEqual(pending.status, 'ready')
+        self.assertEqual(pending.title, 'Edited')
+        self.assertEqual(pending.processing_version, 1)
+        self.assertModified('/api/videos/', etag)
+
+    def test_video_admin_edit_bumps_version(self):
+        url = f'/api/videos/{self.video.pk}/'
+        etag = self.etag(url)
+        self.admin_post(reverse('admin:videos_video_change', args=[self.video.pk]), {
+            'title': 'Renamed', 'file': 'videos/match.mp4', 'status': 'ready',
+            'processing_version': 0,
+        })
+        self.video.refresh_from_db()
+        self.assertEqual(self.video.title, 'Renamed')
+        self.assertEqual(self.video.processing_version, 1)
+        self.assertModified(url, etag)
+
+    def test_player_admin_rename_invalidates_player_list(self):
+        unmentioned = Player.objects.create(name='Barella')
+        etag = self.etag('/api/players/')
+        self.admin_post(reverse('admin:videos_player_change', args=[unmentioned.pk]), {'name': 'Bastoni'})
+        self.assertModified('/api/players/', etag)
+
+    def test_player_admin_rename_invalidates_mentions(self):
+        url = f'/api/mentions/?video={self.video.pk}'
+        etag = self.etag(url)
+        self.admin_post(reverse('admin:videos_player_change', args=[self.player.pk]), {'name': 'Toro'})
+        self.assertModified(url, etag)
+
+    def test_player_admin_delete_invalidates_mentions(self):
+        url = f'/api/mentions/?video={self.video.pk}'
+        etag = self.etag(url)
+        self.admin_post(reverse('admin:videos_player_delete', args=[self.player.pk]), {'post': 'yes'})
+        self.assertModified(url, etag)
+
+    def test_mention_admin_edit_invalidates_old_and_new_video(self):
+        urls = [f'/api/mentions/?video={self.video.pk}', f'/api/mentions/?video={self.other_video.pk}']
+        etags = [self.etag(url) for url in urls]
+        self.admin_post(reverse('admin:videos_videoplayer_change', args=[self.mention.pk]), {
+            'video': self.other_video.pk, 'player': self.player.pk, 'timestamp': '0:00:31',
+        })
+        for url, etag in zip(urls, etags):
+            self.assertModified(url, etag)
+
+    def test_mention_admin_delete_invalidates_video(self):
+        url = f'/api/mentions/?video={self.video.pk}'
+        etag = self.etag(url)
+        self.admin_post(reverse('admin:videos_videoplayer_changelist'), {
+            'action': 'delete_selected', '_selected_action': [self.mention.pk], 'post': 'yes',
+        })
+        self.assertFalse(VideoPlayer.objects.exists())
+        self.assertModified(url, etag)
+
+
+class CascadeCandidateTests(TestCase):
+    names = ['lautaro', 'barella']
+
+    def setUp(self):
+        self.pattern = name_pattern(self.names)
+
+    def test_exact_and_near_miss_names_are_candidates(self):
+        self.assertTrue(is_candidate(' Lautaro,', 0.9, self.names, self.pattern))
+        self.assertTrue(is_candidate(' Lotaro', 0.9, self.names, self.pattern))
+        self.assertFalse(is_candidate(' passa', 0.9, self.names, self.pattern))
+
+    def test_low_confidence_only_widens_similar_words(self):
+        self.assertFalse(is_candidate(' Baretta', 0.9, self.names, self.pattern))
+        self.assertTrue(is_candidate(' Baretta', 0.3, self.names, self.pattern))
+        self.assertFalse(is_candidate(' pallone', 0.1, self.names, self.pattern))
+
+    def test_windows_are_padded_merged_and_clamped(self):
+        words = [
+            (1.0, ' Lautaro', 0.9),
+            (3.0, ' Barella', 0.9),   # overlaps the first window
+            (20.0, ' palla', 0.9),    # not a candidate
+            (40.0, ' Barella', 0.9),
+            (99.0, ' Lautaro', 0.9),  # clamped to the end of the audio
+        ]
+        self.assertEqual(
+            candidate_windows(words, self.names, self.pattern, 100.0),
+            [(0.0, 5.0), (38.0, 42.0), (97.0, 100.0)],
+        )
+
+    def test_blank_names_never_match(self):
+        pattern = name_pattern(['lautaro', ''])
+        self.assertIsNone(pattern.search(' palla'))
+        self.assertIsNotNone(pattern.search(' Lautaro'))
+        self.assertIsNone(name_pattern(['']).search(' palla'))
+        self.assertEqual(name_similarity(' palla', ['']), 0.0)
+
+    def test_no_candidates_means_no_windows(self):
+        self.assertEqual(candidate_windows([(5.0, ' palla', 0.9)], self.names, self.pattern, 10.0), [])
+
+
+class ProcessVideoTaskTests(TestCase):
+    def setUp(self):
+        self.video = Video.objects.create(title='Match', file='videos/match.mp4')
+
+    def run_task(self, players_text, hits=()):
+        with mock.patch('videos.tasks.extract_audio'), \
+                mock.patch('videos.tasks.get_video_duration', return_value=60.0), \
+                mock.patch('videos.tasks.transcribe_single', return_value=list(hits)) as transcribe:
+            process_video_task(self.video.pk, players_text)
+        return transcribe
+
+    def test_blank_player_names_are_ignored(self):
+        transcribe = self.run_task('Lautaro, ,', hits=[(12.0, 'lautaro')])
+        self.assertEqual(transcribe.call_args.args[1], ['lautaro'])
+        self.assertEqual(list(Player.objects.values_list('name', flat=True)), ['Lautaro'])
+        self.assertEqual(VideoPlayer.objects.get().timestamp, '0:00:12')
+
+    @override_settings(TRANSCRIPTION_MODE='cascde')
+    def test_unknown_mode_is_rejected(self):
+        with self.assertRaises(ImproperlyConfigured):
+            self.run_task('Lautaro')
+        self.video.refresh_from_db()
+        self.assertEqual(self.video.status, 'processing')
+
+
+class BenchmarkScoreTests(TestCase):
+    def test_each_reference_mention_matches_once(self):
+        self.assertEqual(score([(1, 'a'), (1.5, 'a')], [(1, 'a')]), (0.5, 1.0))
+
+    def test_matches_need_same_player_within_tolerance(self):
+        hits = [(1.5, 'a'), (40, 'b'), (50, 'b')]
+        reference = [(1, 'a'), (42.5, 'b'), (70, 'a')]
+        self.assertEqual(score(hits, reference), (1 / 3, 1 / 3))
+
+    def test_empty_runs(self):
+        self.assertEqual(score([], []), (1.0, 1.0))
+        self.assertEqual(score([], [(1, 'a')]), (1.0, 0.0))
+
+    def test_load_ground_truth(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as f:
+            f.write('seconds,name\n12.5, Lautaro\n\n# halftime\n3000,Barella\n')
+        self.addCleanup(os.remove, f.name)
+        self.assertEqual(load_ground_truth(f.name), [(12.5, 'lautaro'), (3000.0, 'barella')])
+
+    def test_load_ground_truth_rejects_bad_rows(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as f:
+            f.write('12.5,Lautaro\nsoon,Barella\n')
+        self.addCleanup(os.remove, f.name)
+        with self.assertRaises(CommandError):
+            load_ground_truth(f.name)
+
+
+class BenchmarkCommandTests(TestCase):
+    def test_models_are_loaded_before_timing(self):
+        calls = []
+        command = 'videos.management.commands.benchmark_transcription'
+        with mock.patch(f'{command}.extract_audio'), \
+                mock.patch(f'{command}.load_model', side_effect=lambda name: calls.append(('load', name))), \
+                mock.patch(f'{command}.transcribe_single',
+                           side_effect=lambda *args: calls.append(('single', args[2])) or [(1.0, 'a')]), \
+                mock.patch(f'{command}.transcribe_cascade',
+                           side_effect=lambda *args: calls.append(('cascade',)) or [(1.0, 'a')]):
+            out = StringIO()
+            call_command('benchmark_transcription', 'match.mp4', players='A',
+                         scan_model='tiny', refine_model='small', stdout=out)
+        self.assertEqual(calls[:2], [('load', 'small'), ('load', 'tiny')])
+        self.assertNotIn('load', [call[0] for call in calls[2:]])
+        self.assertIn('load s', out.getvalue())
+        self.assertIn('not accuracy', out.getvalue())
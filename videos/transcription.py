@@ -0,0 +1,128 @@
+from faster_whisper import WhisperModel, decode_audio
+import datetime
+import difflib
+import functools
+import re
+import subprocess
+
+SAMPLE_RATE = 16000
+LANGUAGE = "it"
+
+# Cascade tuning: how much audio the refine model hears around each
+# candidate, and which scan-pass words count as candidates
+WINDOW_PADDING = 2.0          # seconds on each side of a candidate word
+NAME_SIMILARITY = 0.75        # near-miss spellings of a player name
+LOW_CONFIDENCE = 0.5          # word probability below which we doubt the scan
+LOW_CONFIDENCE_SIMILARITY = 0.6
+
+# Helper functions
+def format_time(seconds):
+    return str(datetime.timedelta(seconds=int(seconds)))
+
+def extract_audio(video_path, audio_path):
+    subprocess.run(
+        ["ffmpeg", "-i", video_path, "-vn", "-acodec", "pcm_s16le",
+         "-ar", str(SAMPLE_RATE), "-ac", "1", audio_path, "-y"],
+        check=True
+    )
+
+# Models are kept per process so a worker (or a benchmark) pays the load once
+@functools.lru_cache(maxsize=None)
+def load_model(name):
+    return WhisperModel(name, device="cpu", compute_type="int8")
+
+def name_pattern(player_names):
+    names = [name for name in player_names if name]
+    if not names:
+        return re.compile(r"(?!)")  # an empty alternative would match every word
+    return re.compile(r"\b(" + "|".join(map(re.escape, names)) + r")\b", re.IGNORECASE)
+
+def iter_words(segments, offset=0.0):
+    """Yield (start_seconds, text, probability) for every word, logging progress."""
+    last_print_second = -1
+    for segment in segments:
+        for word in segment.words:
+            start = word.start + offset
+            if int(start) != last_print_second:
+                print(f"Processing word at {format_time(start)}", flush=True)
+                last_print_second = int(start)
+            yield start, word.word, word.probability
+
+def match_words(words, pattern):
+    """Return (start_seconds, lowercase player name) for words naming a player."""
+    matches = []
+    for start, text, _ in words:
+        match = pattern.search(text)
+        if match:
+            matches.append((start, match.group(0).lower()))
+    return matches
+
+def name_similarity(text, player_names):
+    token = re.sub(r"\W+", "", text).lower()
+    if not token:
+        return 0.0
+    return max(
+        (difflib.SequenceMatcher(None, token, name.lower()).ratio() for name in player_names if name),
+        default=0.0,
+    )
+
+def is_candidate(text, probability, player_names, pattern):
+    if pattern.search(text):
+        return True
+    similarity = name_similarity(text, player_names)
+    if similarity >= NAME_SIMILARITY:
+        return True
+    return probability < LOW_CONFIDENCE and similarity >= LOW_CONFIDENCE_SIMILARITY
+
+def candidate_windows(words, player_names, pattern, duration):
+    """Merge padded windows around candidate words into sorted (start, end) spans."""
+    windows = []
+    for start, text, probability in words:
+        if not is_candidate(text, probability, player_names, pattern):
+            continue
+        window_start = max(0.0, start - WINDOW_PADDING)
+        window_end = min(duration, start + WINDOW_PADDING)
+        if windows and window_start <= windows[-1][1]:
+            windows[-1] = (windows[-1][0], max(windows[-1][1], window_end))
+        else:
+            windows.append((window_start, window_end))
+    return windows
+
+def transcribe_single(audio_path, player_names, model_name="tiny"):
+    """One pass over the whole file with a single model."""
+    model = load_model(model_name)
+    segments, _ = model.transcribe(audio_path, beam_size=1, language=LANGUAGE, word_timestamps=True)
+    return match_words(iter_words(segments), name_pattern(player_names))
+
+def transcribe_cascade(audio_path, player_names, scan_model="tiny", refine_model="small"):
+    """
+    Scan the speech regions with a cheap model, then let a larger model
+    re-transcribe only the short windows around likely player names.
+    Only names confirmed by the refine pass are returned.
+    """
+    pattern = name_pattern(player_names)
+    audio = decode_audio(audio_path, sampling_rate=SAMPLE_RATE)
+    duration = len(audio) / SAMPLE_RATE
+
+    print(f"Scan pass ({scan_model})...", flush=True)
+    model = load_model(scan_model)
+    segments, _ = model.transcribe(audio, beam_size=1, language=LANGUAGE,
+                                   word_timestamps=True, vad_filter=True)
+    windows = candidate_windows(iter_words(segments), player_names, pattern, duration)
+    refined_seconds = sum(end - start for start, end in windows)
+    print(f"{len(windows)} candidate windows, {refined_seconds:.0f}s of "
+          f"{duration:.0f}s to refine", flush=True)
+    if not windows:
+        return []
+
+    print(f"Refine pass ({refine_model})...", flush=True)
+    model = load_model(refine_model)
+    prompt = ", ".join(player_names)
+    matches = []
+    for start, end in windows:
+        clip = audio[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)]
+        segments, _ = model.transcribe(clip, beam_size=5, language=LANGUAGE,
+                                       word_timestamps=True, initial_prompt=prompt,
+                                       condition_on_previous_text=False)
+        matches.extend(match_words(iter_words(segments, offset=start), pattern))
+    return matches
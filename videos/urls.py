@@ -1,5 +1,11 @@
-from django.urls import path
-from . import views
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from . import views, api
+
+router = DefaultRouter()
+router.register('players', api.PlayerViewSet, basename='api-player')
+router.register('videos', api.VideoViewSet, basename='api-video')
+router.register('mentions', api.MentionViewSet, basename='api-mention')
 
 urlpatterns = [
     path('register/', views.register_view, name='register'),
@@ -9,4 +15,5 @@ urlpatterns = [
     path('upload/', views.upload_video, name='upload_video'),
     path('videos/', views.video_list, name='video_list'),
     path("stream/<path:path>", views.stream_video, name="stream_video"),
+    path('api/', include(router.urls)),
 ]